@@ -1,20 +1,41 @@
+import collections
 import datetime
 import hashlib
 import json
-import random
-import string
+import os
+import secrets
+import struct
+import threading
+import time
 
 from PyQt5.QtWidgets import QScrollArea
 from flask import Flask
-from PyQt5 import QtWidgets
+from PyQt5 import QtCore, QtWidgets
+
+# The compiled nonce search is optional and only used when numba is installed
+try:
+    import pow_numba
+except ImportError:
+    pow_numba = None
+
+# The GPU nonce search is optional and only used when it is enabled, cupy is installed and a CUDA device is present
+try:
+    import pow_cuda
+except ImportError:
+    pow_cuda = None
+
+# Upper bound of the nonce space searched by the proof of work
+MAX_NONCE = 2 ** 32
+# Default number of consecutive nonce values tried per call to Blockchain.search_nonce
+NONCE_BATCH_SIZE = 4096
 
 
 class Block:
-    def __init__(self, index: int, timestamp: datetime, transactions: list, previous_hash: str) -> None:
+    def __init__(self, index: int, timestamp: int, transactions: list, previous_hash: str) -> None:
         """
         Parameters:
         index (int): The index of the block in the chain
-        timestamp (datetime): The timestamp of when the block was created
+        timestamp (int): The timestamp of when the block was created, in nanoseconds since the epoch
         transactions (list): A list of transaction dictionaries
         previous_hash (str): The hash of the previous block in the chain
         """
@@ -23,7 +44,27 @@ class Block:
         self.transactions = transactions
         self.previous_hash = previous_hash
         self.nonce = 0
-        self.hash = self.calculate_hash()
+        # Blocks are never modified after creation, so everything except the nonce is serialized once. The
+        # transactions are serialized as compact JSON with sorted keys so the hash does not depend on dict ordering
+        self._tx_bytes = json.dumps(transactions, sort_keys=True, separators=(',', ':')).encode('utf-8')
+        self._prefix = b''.join([str(index).encode('utf-8'), struct.pack('<Q', timestamp), self._tx_bytes,
+                                 previous_hash.encode('utf-8')])
+        # Hash state after the prefix, copied by calculate_hash so only the nonce digits are hashed per call
+        self._prefix_midstate = hashlib.sha256(self._prefix)
+        # Raw 32-byte digest of the block, used by the proof of work, and its hex string kept for display and validation
+        self.hash_raw = self.calculate_digest()
+        self.hash = self.hash_raw.hex()
+
+    def calculate_digest(self) -> bytes:
+        """
+        Method to calculate the raw SHA-256 digest of the block data
+
+        Returns:
+        bytes: The calculated 32-byte digest
+        """
+        sha = self._prefix_midstate.copy()
+        sha.update(str(self.nonce).encode('utf-8'))
+        return sha.digest()
 
     def calculate_hash(self) -> str:
         """
@@ -32,23 +73,50 @@ class Block:
         Returns:
         str: The calculated hash value
         """
-        data = str(self.index) + str(self.timestamp) + str(self.transactions) + str(self.previous_hash) + str(
-            self.nonce)
-        sha = hashlib.sha256()
-        sha.update(data.encode('utf-8'))
-        return sha.hexdigest()
+        return self.calculate_digest().hex()
 
 
 class Blockchain:
-    def __init__(self):
+    def __init__(self, nonce_batch_size: int = None, mining_threads: int = None, use_cuda: bool = None):
         """
         Initializes the chain with the genesis block
+
+        Parameters:
+        nonce_batch_size (int): The number of nonce values tried per batch of the proof of work, defaults to one GPU launch when mining on CUDA
+        mining_threads (int): The number of threads searching for a nonce, defaults to one per core when mining with numba
+        use_cuda (bool): Whether to mine on a CUDA device if one is available, defaults to the BLOCKCHAIN_USE_CUDA environment variable being set to 1
         """
 
+        # Balance of every address, updated as blocks are added to the chain. Integer zeros keep the balance of an
+        # address that only received rewards an int, as the previous chain scan returned
+        self._balances = collections.defaultdict(int)
+        # Index of every transaction in the chain by its ID
+        self._tx_by_id = {}
         # List of blocks in the chain, initialized with the genesis block
         self.chain = [self.create_genesis_block()]
+        # Index of the last block already verified by is_chain_valid. Blocks are immutable after creation, so a
+        # verified block is never re-checked
+        self._last_verified_index = 0
         # List of pending transactions to be added to the next mined block in the chain
         self.pending_transactions = []
+        # The GPU search is opt-in until its kernel has been verified on real hardware
+        if use_cuda is None:
+            use_cuda = os.environ.get('BLOCKCHAIN_USE_CUDA') == '1'
+        # Backend providing prefix_midstate and search_nonce, the GPU or compiled one if available, otherwise hashlib
+        if use_cuda and pow_cuda is not None and pow_cuda.is_available():
+            self._pow = pow_cuda
+        elif pow_numba is not None:
+            self._pow = pow_numba
+        else:
+            self._pow = self
+        # Batch size used by the proof of work, small batches keep the search responsive to an early hit
+        if nonce_batch_size is None:
+            nonce_batch_size = pow_cuda.NONCE_BATCH_SIZE if self._pow is pow_cuda else NONCE_BATCH_SIZE
+        self.nonce_batch_size = nonce_batch_size
+        # Only the compiled CPU search gains from threads, hashlib holds the GIL and the GPU runs a thread per nonce
+        if mining_threads is None:
+            mining_threads = (os.cpu_count() or 1) if self._pow is pow_numba else 1
+        self.mining_threads = mining_threads
 
     def create_genesis_block(self) -> Block:
         """
@@ -57,7 +125,7 @@ class Blockchain:
         Returns:
         Block: The genesis block object
         """
-        return Block(index=0, timestamp=datetime.datetime.now(), transactions=[], previous_hash="0")
+        return Block(index=0, timestamp=time.time_ns(), transactions=[], previous_hash="0")
 
     def add_block(self, block: Block) -> None:
         """
@@ -67,6 +135,32 @@ class Blockchain:
         block (Block): The block object to add to the chain
         """
         self.chain.append(block)
+        for transaction in block.transactions:
+            self._apply_to_balances(transaction)
+            # Keep the earliest transaction if an ID is ever repeated, as the previous chain scan did
+            self._tx_by_id.setdefault(transaction['id'], transaction)
+
+    def _apply_to_balances(self, transaction: dict) -> None:
+        """
+        Method to apply a transaction of the chain to the balance ledger
+
+        Parameters:
+        transaction (dict): The transaction to apply
+        """
+
+        # A transaction sent by the address only counts as sent, even if the address is also the recipient
+        self._balances[transaction['sender']] -= transaction['amount']
+        if transaction['recipient'] != transaction['sender']:
+            self._balances[transaction['recipient']] += transaction['amount']
+
+    def _rebuild_balances(self) -> None:
+        """
+        Method to recompute the balance ledger from all transactions in the chain
+        """
+        self._balances = collections.defaultdict(int)
+        for block in self.chain:
+            for transaction in block.transactions:
+                self._apply_to_balances(transaction)
 
     def mine_block(self, miner_address: str) -> bool:
         """
@@ -80,10 +174,12 @@ class Blockchain:
         if len(self.pending_transactions) == 0:
             return False
         # Create a new block with the pending transactions and add it to the chain
-        block = Block(index=len(self.chain), timestamp=datetime.datetime.now(),
+        block = Block(index=len(self.chain), timestamp=time.time_ns(),
                       transactions=self.pending_transactions, previous_hash=self.chain[-1].hash)
         # Find a nonce value that makes the block hash satisfy a certain condition
-        block.nonce = self.proof_of_work(block.hash)
+        block.nonce = self.proof_of_work(block.hash_raw)
+        # Hash the block again with its nonce so is_chain_valid can verify it, hash_raw stays the proof of work input
+        block.hash = block.calculate_hash()
         # Add the block to the chain
         self.add_block(block)
         # Reward the miner by adding a transaction to the pending transactions list
@@ -103,29 +199,115 @@ class Blockchain:
         Returns:
         str: The generated transaction ID
         """
-        return ''.join(random.choices(string.ascii_letters + string.digits, k=10))
+        # 8 random bytes encode to 11 URL-safe characters, keep the 10 characters IDs always had
+        return secrets.token_urlsafe(8)[:10]
 
-    def proof_of_work(self, block_hash: str) -> int:
+    def proof_of_work(self, block_hash_raw: bytes) -> int:
         """
         Method to find a nonce value that makes the block hash satisfy a certain condition (in this case, the first 4 digits must be 0)
 
         Parameters:
-        block_hash (str): The hash of the block to mine
+        block_hash_raw (bytes): The raw 32-byte hash of the block to mine, which with the nonce fits a single SHA-256 block
 
         Returns:
         int: The nonce value that satisfies the condition
         """
-        nonce = 0
-        while self.valid_proof(block_hash, nonce) is False:
-            nonce += 1
-        return nonce
+        # Absorb the constant prefix once so each candidate only costs the compression of its final block
+        midstate, tail = self._pow.prefix_midstate(block_hash_raw)
+        if self.mining_threads > 1:
+            return self.parallel_proof_of_work(midstate, tail)
+        # Search the nonce space in fixed-size batches, stopping at the first batch that contains a valid nonce
+        for start_nonce in range(0, MAX_NONCE, self.nonce_batch_size):
+            nonce = self._pow.search_nonce(midstate, tail, start_nonce, self.nonce_batch_size)
+            if nonce != -1:
+                return nonce
+        return -1
 
-    def valid_proof(self, block_hash: str, nonce: int) -> bool:
+    def parallel_proof_of_work(self, midstate, tail) -> int:
+        """
+        Method to search the nonce space for a valid nonce with several threads
+
+        Each thread takes every n-th batch of the nonce space, and a thread stops as soon as its next batch starts
+        beyond the best nonce found so far, so the result is the same smallest nonce as the sequential search
+
+        Parameters:
+        midstate: The midstate returned by the backend's prefix_midstate
+        tail: The remaining prefix bytes returned by the backend's prefix_midstate
+
+        Returns:
+        int: The smallest nonce value that satisfies the condition, or -1 if there is none
+        """
+        batch_size = self.nonce_batch_size
+        stride = batch_size * self.mining_threads
+        # Smallest valid nonce found by any thread, shared between the threads
+        best = [MAX_NONCE]
+        lock = threading.Lock()
+
+        def worker(first_nonce: int) -> None:
+            for start_nonce in range(first_nonce, MAX_NONCE, stride):
+                if start_nonce >= best[0]:
+                    return
+                nonce = self._pow.search_nonce(midstate, tail, start_nonce, batch_size)
+                if nonce != -1:
+                    with lock:
+                        best[0] = min(best[0], nonce)
+                    return
+
+        threads = [threading.Thread(target=worker, args=(i * batch_size,)) for i in range(self.mining_threads)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return best[0] if best[0] != MAX_NONCE else -1
+
+    def prefix_midstate(self, prefix: bytes) -> tuple:
+        """
+        Method to absorb a prefix that is shared by every candidate nonce into a SHA-256 hash object
+
+        The hash object compresses the complete 64-byte blocks and buffers the rest, so copies of it carry the whole
+        prefix and no tail is left to append to each nonce
+
+        Parameters:
+        prefix (bytes): The raw block hash that every candidate nonce is appended to
+
+        Returns:
+        tuple: The hash object holding the midstate and the remaining bytes of the prefix, which are always empty
+        """
+        return hashlib.sha256(prefix), b''
+
+    def search_nonce(self, midstate, tail: bytes, start_nonce: int, count: int) -> int:
+        """
+        Method to search a range of nonce values for one that makes the hash of the prefix satisfy the condition
+
+        Parameters:
+        midstate (hashlib._Hash): The hash object that has already absorbed the prefix
+        tail (bytes): The remaining bytes of the prefix that every candidate nonce is appended to
+        start_nonce (int): The first nonce value to try
+        count (int): The number of consecutive nonce values to try
+
+        Returns:
+        int: The first nonce value in the range that satisfies the condition, or -1 if there is none
+        """
+
+        if tail:
+            midstate = midstate.copy()
+            midstate.update(tail)
+        # Bind the copy method locally, hashlib already dispatches to the fastest SHA-256 the CPU supports
+        copy = midstate.copy
+        for nonce in range(start_nonce, start_nonce + count):
+            sha = copy()
+            sha.update(b'%d' % nonce)
+            digest = sha.digest()
+            if not digest[0] | digest[1]:
+                return nonce
+        return -1
+
+    def valid_proof(self, block_hash_raw: bytes, nonce: int) -> bool:
         """
         Method to check if the given nonce value makes the block hash satisfy a certain condition
 
         Parameters:
-        block_hash (str): The hash of the block to check
+        block_hash_raw (bytes): The raw 32-byte hash of the block to check
         nonce (int): The nonce value to check
 
         Returns:
@@ -133,10 +315,11 @@ class Blockchain:
         """
 
         # Calculate the hash of the block with the given nonce value
-        guess = f'{block_hash}{nonce}'.encode()
-        guess_hash = hashlib.sha256(guess).hexdigest()
-        # Check if the first 4 digits of the hash are 0
-        return guess_hash[:4] == "0000"
+        guess = block_hash_raw + b'%d' % nonce
+        guess_hash = hashlib.sha256(guess).digest()
+        # Check if the first 4 hex digits of the hash are 0, which are the first 2 bytes of the raw digest and the top
+        # 16 bits of the first SHA-256 state word checked by pow_numba
+        return (guess_hash[0] | guess_hash[1]) == 0
 
     def add_transaction(self, sender: str, recipient: str, amount: float) -> None:
         """
@@ -157,7 +340,7 @@ class Blockchain:
 
     def get_balance(self, address: str) -> float:
         """
-        Method to calculate the balance of the given address by iterating through all transactions in the blockchain
+        Method to get the balance of the given address from the ledger of all transactions in the blockchain
 
         Parameters:
         address (str): The address to get the balance for
@@ -165,14 +348,7 @@ class Blockchain:
         Returns:
         float: The balance of the address
         """
-        balance = 0
-        for block in self.chain:
-            for transaction in block.transactions:
-                if transaction['sender'] == address:
-                    balance -= transaction['amount']
-                elif transaction['recipient'] == address:
-                    balance += transaction['amount']
-        return balance
+        return self._balances.get(address, 0)
 
     def get_transaction_by_id(self, transaction_id: str) -> dict:
         """
@@ -184,11 +360,7 @@ class Blockchain:
         Returns:
         dict: The transaction with the given ID, or None if no transaction is found
         """
-        for block in self.chain:
-            for transaction in block.transactions:
-                if transaction['id'] == transaction_id:
-                    return transaction
-        return None
+        return self._tx_by_id.get(transaction_id)
 
     def is_chain_valid(self) -> bool:
         """
@@ -197,13 +369,18 @@ class Blockchain:
         Returns:
         bool: True if the blockchain is valid, False otherwise
         """
-        for i in range(1, len(self.chain)):
+
+        # Only the blocks added since the last successful check need to be verified
+        for i in range(max(1, self._last_verified_index + 1), len(self.chain)):
             current_block = self.chain[i]
             previous_block = self.chain[i - 1]
-            if current_block.hash != current_block.calculate_hash():
-                return False
-            if current_block.previous_hash != previous_block.hash:
+            if current_block.hash != current_block.calculate_hash() or \
+                    current_block.previous_hash != previous_block.hash:
+                # A block that was not verified yet does not match its hash or the previous block, so resync the
+                # ledger with what the blocks contain
+                self._rebuild_balances()
                 return False
+        self._last_verified_index = len(self.chain) - 1
         return True
 
 
@@ -211,6 +388,35 @@ app = Flask(__name__)
 blockchain = Blockchain()
 
 
+class MinerThread(QtCore.QThread):
+    # Signal emitted with the result of Blockchain.mine_block once mining has finished
+    mined = QtCore.pyqtSignal(bool)
+    # Signal emitted with the error message if Blockchain.mine_block raised an exception
+    failed = QtCore.pyqtSignal(str)
+
+    def __init__(self, miner_address: str) -> None:
+        """
+        Constructor method for MinerThread class which mines a block without blocking the GUI
+
+        Parameters:
+        miner_address (str): The address of the miner who mines the block
+        """
+        super().__init__()
+        self.miner_address = miner_address
+
+    def run(self) -> None:
+        """
+        Method to mine a new block in the blockchain on the worker thread
+        """
+        try:
+            mined = blockchain.mine_block(self.miner_address)
+        except Exception as error:
+            # Report the error to the GUI instead of ending the thread silently, the block was not added to the chain
+            self.failed.emit(str(error))
+        else:
+            self.mined.emit(mined)
+
+
 class BlockchainGUI(QtWidgets.QMainWindow):
     def __init__(self):
         """
@@ -311,6 +517,9 @@ class BlockchainGUI(QtWidgets.QMainWindow):
         self.copy_blockchain_button.clicked.connect(self.copy_blockchain)
         self.layout.addWidget(self.copy_blockchain_button)
 
+        # Number of blocks already shown in the chain label
+        self._chain_text_len_last = 0
+
         # Update the chain label with the current state of the blockchain
         self.update_chain_label()
 
@@ -327,15 +536,21 @@ class BlockchainGUI(QtWidgets.QMainWindow):
         """
         Method to update the chain label with the current state of the blockchain
         """
-        chain_text = "Blockchain:\n"
 
-        # Loop through each block in the blockchain and add its information to the chain label
-        for block in blockchain.chain:
-            block_text = f"Index: {block.index}\nTimestamp: {block.timestamp}\nTransactions: {json.dumps(block.transactions)}\nPrevious Hash: {block.previous_hash}\nHash: {block.hash}\n\n"
-            chain_text += block_text
+        # Render only the blocks that were added to the blockchain since the last update
+        new_texts = []
+        for block in blockchain.chain[self._chain_text_len_last:]:
+            block_text = f"Index: {block.index}\nTimestamp: {datetime.datetime.fromtimestamp(block.timestamp / 1e9)}\nTransactions: {json.dumps(block.transactions)}\nPrevious Hash: {block.previous_hash}\nHash: {block.hash}\n"
+            new_texts.append(block_text)
+        if not new_texts:
+            return
 
-        # Update the chain label
-        self.chain_text_edit.setText(chain_text)
+        # Fill the chain label on the first update, afterwards append the new blocks to it
+        if not self._chain_text_len_last:
+            self.chain_text_edit.setText("Blockchain:\n" + "\n".join(new_texts))
+        else:
+            self.chain_text_edit.append("\n".join(new_texts))
+        self._chain_text_len_last += len(new_texts)
 
     def add_transaction(self) -> None:
         """
@@ -364,8 +579,32 @@ class BlockchainGUI(QtWidgets.QMainWindow):
         # Get the miner's address from the input field
         miner_address = self.address_input.text()
 
-        # Mine the block
-        mined = blockchain.mine_block(miner_address)
+        # Disable the buttons that change the blockchain until mining has finished
+        self.add_transaction_button.setEnabled(False)
+        self.mine_block_button.setEnabled(False)
+
+        # Mine the block on a worker thread so the GUI stays responsive
+        self.miner_thread = MinerThread(miner_address)
+        self.miner_thread.mined.connect(self._on_mined)
+        self.miner_thread.failed.connect(self._on_mine_failed)
+        # Enable the buttons again whenever the thread ends, whether or not mining succeeded
+        self.miner_thread.finished.connect(self._on_miner_finished)
+        self.miner_thread.start()
+
+    def _on_miner_finished(self) -> None:
+        """
+        Method to enable the buttons that change the blockchain once the worker thread has ended
+        """
+        self.add_transaction_button.setEnabled(True)
+        self.mine_block_button.setEnabled(True)
+
+    def _on_mined(self, mined: bool) -> None:
+        """
+        Method to update the GUI once the worker thread has finished mining
+
+        Parameters:
+        mined (bool): True if a block was mined, False if there were no transactions to mine
+        """
 
         # If the block was mined, clear the input field and update the chain label
         if mined:
@@ -375,6 +614,15 @@ class BlockchainGUI(QtWidgets.QMainWindow):
         else:  # If the block was not mined, display a warning message
             QtWidgets.QMessageBox.warning(self, "No Transactions", "There are no transactions to mine!")
 
+    def _on_mine_failed(self, error: str) -> None:
+        """
+        Method to display the error raised by the worker thread while mining
+
+        Parameters:
+        error (str): The message of the error raised by Blockchain.mine_block
+        """
+        QtWidgets.QMessageBox.critical(self, "Mining Failed", f"The block could not be mined: {error}")
+
     def search_transaction(self) -> None:
         """
         Method to search for a transaction in the blockchain by its ID and display the result in a message box
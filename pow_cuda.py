@@ -0,0 +1,202 @@
+import cupy as cp
+import numpy as np
+
+# CUDA source of the nonce search, every thread tries a single nonce
+_SOURCE = r'''
+extern "C" {
+
+__constant__ unsigned int K[64] = {
+    0x428a2f98, 0x71374491, 0xb5c0fbcf, 0xe9b5dba5, 0x3956c25b, 0x59f111f1, 0x923f82a4, 0xab1c5ed5,
+    0xd807aa98, 0x12835b01, 0x243185be, 0x550c7dc3, 0x72be5d74, 0x80deb1fe, 0x9bdc06a7, 0xc19bf174,
+    0xe49b69c1, 0xefbe4786, 0x0fc19dc6, 0x240ca1cc, 0x2de92c6f, 0x4a7484aa, 0x5cb0a9dc, 0x76f988da,
+    0x983e5152, 0xa831c66d, 0xb00327c8, 0xbf597fc7, 0xc6e00bf3, 0xd5a79147, 0x06ca6351, 0x14292967,
+    0x27b70a85, 0x2e1b2138, 0x4d2c6dfc, 0x53380d13, 0x650a7354, 0x766a0abb, 0x81c2c92e, 0x92722c85,
+    0xa2bfe8a1, 0xa81a664b, 0xc24b8b70, 0xc76c51a3, 0xd192e819, 0xd6990624, 0xf40e3585, 0x106aa070,
+    0x19a4c116, 0x1e376c08, 0x2748774c, 0x34b0bcb5, 0x391c0cb3, 0x4ed8aa4a, 0x5b9cca4f, 0x682e6ff3,
+    0x748f82ee, 0x78a5636f, 0x84c87814, 0x8cc70208, 0x90befffa, 0xa4506ceb, 0xbef9a3f7, 0xc67178f2,
+};
+
+__device__ __forceinline__ unsigned int rotr(unsigned int x, int n) {
+    return __funnelshift_r(x, x, n);
+}
+
+// Only the first hash word is computed when full is false, the difficulty check does not look at the others
+__device__ __forceinline__ void compress(unsigned int *state, const unsigned char *block, bool full) {
+    unsigned int w[64];
+    for (int t = 0; t < 16; t++) {
+        w[t] = ((unsigned int)block[4 * t] << 24) | ((unsigned int)block[4 * t + 1] << 16) |
+               ((unsigned int)block[4 * t + 2] << 8) | (unsigned int)block[4 * t + 3];
+    }
+    for (int t = 16; t < 64; t++) {
+        unsigned int s0 = rotr(w[t - 15], 7) ^ rotr(w[t - 15], 18) ^ (w[t - 15] >> 3);
+        unsigned int s1 = rotr(w[t - 2], 17) ^ rotr(w[t - 2], 19) ^ (w[t - 2] >> 10);
+        w[t] = w[t - 16] + s0 + w[t - 7] + s1;
+    }
+
+    unsigned int a = state[0], b = state[1], c = state[2], d = state[3];
+    unsigned int e = state[4], f = state[5], g = state[6], h = state[7];
+    #pragma unroll
+    for (int t = 0; t < 63; t++) {
+        unsigned int t1 = h + (rotr(e, 6) ^ rotr(e, 11) ^ rotr(e, 25)) + ((e & f) ^ (~e & g)) + K[t] + w[t];
+        unsigned int t2 = (rotr(a, 2) ^ rotr(a, 13) ^ rotr(a, 22)) + ((a & b) ^ (a & c) ^ (b & c));
+        h = g;
+        g = f;
+        f = e;
+        e = d + t1;
+        d = c;
+        c = b;
+        b = a;
+        a = t1 + t2;
+    }
+
+    unsigned int t1 = h + (rotr(e, 6) ^ rotr(e, 11) ^ rotr(e, 25)) + ((e & f) ^ (~e & g)) + K[63] + w[63];
+    unsigned int t2 = (rotr(a, 2) ^ rotr(a, 13) ^ rotr(a, 22)) + ((a & b) ^ (a & c) ^ (b & c));
+    state[0] += t1 + t2;
+    if (!full) {
+        return;
+    }
+    state[1] += a;
+    state[2] += b;
+    state[3] += c;
+    state[4] += d + t1;
+    state[5] += e;
+    state[6] += f;
+    state[7] += g;
+}
+
+__global__ void prefix_kernel(const unsigned char *prefix, int blocks, unsigned int *state) {
+    for (int i = 0; i < blocks; i++) {
+        compress(state, prefix + 64 * i, true);
+    }
+}
+
+__global__ void mine_kernel(const unsigned int *midstate, const unsigned char *tail, int tail_len,
+                            unsigned long long length, unsigned long long start_nonce,
+                            unsigned long long count, unsigned long long *winner) {
+    unsigned long long index = (unsigned long long)blockIdx.x * blockDim.x + threadIdx.x;
+    if (index >= count) {
+        return;
+    }
+    unsigned long long nonce = start_nonce + index;
+
+    // Write the decimal digits of the nonce after the tail, followed by the SHA-256 padding
+    unsigned char buffer[128];
+    for (int i = 0; i < tail_len; i++) {
+        buffer[i] = tail[i];
+    }
+    unsigned char digits[20];
+    int k = 0;
+    unsigned long long n = nonce;
+    do {
+        digits[k++] = '0' + n % 10;
+        n /= 10;
+    } while (n);
+    int pos = tail_len;
+    while (k) {
+        buffer[pos++] = digits[--k];
+    }
+    buffer[pos] = 0x80;
+    int end = pos + 9 <= 64 ? 64 : 128;
+    for (int i = pos + 1; i < end - 8; i++) {
+        buffer[i] = 0;
+    }
+    unsigned long long bits = (length + pos) * 8;
+    for (int i = 0; i < 8; i++) {
+        buffer[end - 1 - i] = (unsigned char)(bits >> (8 * i));
+    }
+
+    unsigned int state[8];
+    for (int i = 0; i < 8; i++) {
+        state[i] = midstate[i];
+    }
+    if (end == 128) {
+        compress(state, buffer, true);
+        compress(state, buffer + 64, false);
+    } else {
+        compress(state, buffer, false);
+    }
+    // The first 4 hex digits of the hash are 0 exactly when the top 16 bits of the first word are 0
+    if ((state[0] >> 16) == 0) {
+        atomicMin(winner, nonce);
+    }
+}
+
+}
+'''
+
+_module = cp.RawModule(code=_SOURCE)
+
+# SHA-256 initial hash value
+IV = np.array([
+    0x6a09e667, 0xbb67ae85, 0x3c6ef372, 0xa54ff53a, 0x510e527f, 0x9b05688c, 0x1f83d9ab, 0x5be0cd19,
+], dtype=np.uint32)
+
+# Launch shape of one batch, one nonce per thread
+THREADS_PER_BLOCK = 256
+NONCE_BATCH_SIZE = 65536 * THREADS_PER_BLOCK
+
+# Value of the winner slot while no thread has found a valid nonce
+_NO_WINNER = 2 ** 64 - 1
+
+
+def is_available() -> bool:
+    """
+    Function to check if a CUDA device can be used and the kernels compile for it
+
+    The kernels are compiled lazily, so they are compiled here rather than on the first mining call, where a failure
+    would end the mining thread instead of falling back to another backend
+
+    Returns:
+    bool: True if a CUDA device is present and the kernels compiled, False otherwise
+    """
+    try:
+        if cp.cuda.runtime.getDeviceCount() == 0:
+            return False
+        _module.get_function('prefix_kernel')
+        _module.get_function('mine_kernel')
+        return True
+    except (cp.cuda.runtime.CUDARuntimeError, cp.cuda.driver.CUDADriverError, cp.cuda.compiler.CompileException):
+        return False
+
+
+def prefix_midstate(prefix: bytes) -> tuple:
+    """
+    Function to hash the complete 64-byte SHA-256 blocks of a prefix on the device and keep the result there
+
+    Parameters:
+    prefix (bytes): The raw block hash that every candidate nonce is appended to
+
+    Returns:
+    tuple: The device midstate with the number of bytes it absorbed, and the remaining bytes of the prefix on the device
+    """
+    split = len(prefix) - len(prefix) % 64
+    state = cp.asarray(IV)
+    if split:
+        blocks = cp.asarray(np.frombuffer(prefix[:split], dtype=np.uint8))
+        _module.get_function('prefix_kernel')((1,), (1,), (blocks, np.int32(split // 64), state))
+    tail = cp.asarray(np.frombuffer(prefix[split:], dtype=np.uint8))
+    return (state, split), tail
+
+
+def search_nonce(midstate: tuple, tail, start_nonce: int, count: int) -> int:
+    """
+    Function to search a range of nonce values on the device, one thread per nonce
+
+    Parameters:
+    midstate (tuple): The device midstate and absorbed length returned by prefix_midstate
+    tail (cupy.ndarray): The remaining prefix bytes returned by prefix_midstate
+    start_nonce (int): The first nonce value to try
+    count (int): The number of consecutive nonce values to try
+
+    Returns:
+    int: The first nonce value in the range that satisfies the condition, or -1 if there is none
+    """
+    state, length = midstate
+    winner = cp.full(1, _NO_WINNER, dtype=cp.uint64)
+    grid = (count + THREADS_PER_BLOCK - 1) // THREADS_PER_BLOCK
+    _module.get_function('mine_kernel')(
+        (grid,), (THREADS_PER_BLOCK,),
+        (state, tail, np.int32(tail.size), np.uint64(length), np.uint64(start_nonce), np.uint64(count), winner))
+    # Every thread with a valid nonce lowers the winner slot, so it ends up holding the first one in the range
+    nonce = int(winner.get()[0])
+    return nonce if nonce != _NO_WINNER else -1
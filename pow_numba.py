@@ -0,0 +1,308 @@
+import numpy as np
+from numba import njit
+
+# SHA-256 round constants
+K = np.array([
+    0x428a2f98, 0x71374491, 0xb5c0fbcf, 0xe9b5dba5, 0x3956c25b, 0x59f111f1, 0x923f82a4, 0xab1c5ed5,
+    0xd807aa98, 0x12835b01, 0x243185be, 0x550c7dc3, 0x72be5d74, 0x80deb1fe, 0x9bdc06a7, 0xc19bf174,
+    0xe49b69c1, 0xefbe4786, 0x0fc19dc6, 0x240ca1cc, 0x2de92c6f, 0x4a7484aa, 0x5cb0a9dc, 0x76f988da,
+    0x983e5152, 0xa831c66d, 0xb00327c8, 0xbf597fc7, 0xc6e00bf3, 0xd5a79147, 0x06ca6351, 0x14292967,
+    0x27b70a85, 0x2e1b2138, 0x4d2c6dfc, 0x53380d13, 0x650a7354, 0x766a0abb, 0x81c2c92e, 0x92722c85,
+    0xa2bfe8a1, 0xa81a664b, 0xc24b8b70, 0xc76c51a3, 0xd192e819, 0xd6990624, 0xf40e3585, 0x106aa070,
+    0x19a4c116, 0x1e376c08, 0x2748774c, 0x34b0bcb5, 0x391c0cb3, 0x4ed8aa4a, 0x5b9cca4f, 0x682e6ff3,
+    0x748f82ee, 0x78a5636f, 0x84c87814, 0x8cc70208, 0x90befffa, 0xa4506ceb, 0xbef9a3f7, 0xc67178f2,
+], dtype=np.int64)
+
+# SHA-256 initial hash value
+IV = np.array([
+    0x6a09e667, 0xbb67ae85, 0x3c6ef372, 0xa54ff53a, 0x510e527f, 0x9b05688c, 0x1f83d9ab, 0x5be0cd19,
+], dtype=np.int64)
+
+# Words are held in 64-bit integers and masked back to 32 bits after every addition
+MASK = 0xFFFFFFFF
+
+
+@njit(cache=True, nogil=True)
+def _rotr(x: int, n: int) -> int:
+    """
+    Function to rotate a 32-bit word right by n bits
+    """
+    return ((x >> n) | (x << (32 - n))) & MASK
+
+
+@njit(cache=True, nogil=True)
+def _sha256_rounds(working: tuple, w: np.ndarray, first_round: int, last_round: int) -> tuple:
+    """
+    Function to run a range of SHA-256 rounds over an expanded message schedule
+
+    Parameters:
+    working (tuple): The eight working variables a to h before the first round
+    w (np.ndarray): The 64-word message schedule
+    first_round (int): The first round to run
+    last_round (int): The round to stop before
+
+    Returns:
+    tuple: The eight working variables after the last round
+    """
+    a, b, c, d, e, f, g, h = working
+    for t in range(first_round, last_round):
+        s1 = _rotr(e, 6) ^ _rotr(e, 11) ^ _rotr(e, 25)
+        ch = (e & f) ^ (~e & g)
+        t1 = (h + s1 + ch + K[t] + w[t]) & MASK
+        s0 = _rotr(a, 2) ^ _rotr(a, 13) ^ _rotr(a, 22)
+        maj = (a & b) ^ (a & c) ^ (b & c)
+        t2 = (s0 + maj) & MASK
+        h = g
+        g = f
+        f = e
+        e = (d + t1) & MASK
+        d = c
+        c = b
+        b = a
+        a = (t1 + t2) & MASK
+    return a, b, c, d, e, f, g, h
+
+
+@njit(cache=True, nogil=True)
+def _feed_forward(state: np.ndarray, base: np.ndarray, working: tuple) -> None:
+    """
+    Function to add the working variables after the last round to the hash words the block started from
+
+    Parameters:
+    state (np.ndarray): The eight resulting hash words, filled in
+    base (np.ndarray): The eight hash words before the block
+    working (tuple): The eight working variables after the last round
+    """
+    a, b, c, d, e, f, g, h = working
+    state[0] = (base[0] + a) & MASK
+    state[1] = (base[1] + b) & MASK
+    state[2] = (base[2] + c) & MASK
+    state[3] = (base[3] + d) & MASK
+    state[4] = (base[4] + e) & MASK
+    state[5] = (base[5] + f) & MASK
+    state[6] = (base[6] + g) & MASK
+    state[7] = (base[7] + h) & MASK
+
+
+@njit(cache=True, nogil=True)
+def _first_hash_word(working: tuple, w: np.ndarray, first_round: int, base: int) -> int:
+    """
+    Function to run the remaining rounds of a final block and compute only the first word of the hash
+
+    The difficulty check only looks at the first word, so the other working variables of the last round and the
+    feed-forward of the other seven words are skipped
+
+    Parameters:
+    working (tuple): The eight working variables a to h before the first round
+    w (np.ndarray): The 64-word message schedule
+    first_round (int): The first round to run
+    base (int): The first hash word before the block
+
+    Returns:
+    int: The first word of the resulting hash
+    """
+    a, b, c, d, e, f, g, h = _sha256_rounds(working, w, first_round, 63)
+    t1 = h + (_rotr(e, 6) ^ _rotr(e, 11) ^ _rotr(e, 25)) + ((e & f) ^ (~e & g)) + K[63] + w[63]
+    t2 = (_rotr(a, 2) ^ _rotr(a, 13) ^ _rotr(a, 22)) + ((a & b) ^ (a & c) ^ (b & c))
+    return (base + t1 + t2) & MASK
+
+
+@njit(cache=True, nogil=True)
+def _expand_schedule(w: np.ndarray, fixed: np.ndarray) -> None:
+    """
+    Function to expand the first 16 words of a message schedule to all 64 words
+
+    Parameters:
+    w (np.ndarray): The 64-word message schedule, of which the first 16 words are set
+    fixed (np.ndarray): Flags of the words that are already expanded and must not be recomputed
+    """
+    for t in range(16, 64):
+        if not fixed[t]:
+            s0 = _rotr(w[t - 15], 7) ^ _rotr(w[t - 15], 18) ^ (w[t - 15] >> 3)
+            s1 = _rotr(w[t - 2], 17) ^ _rotr(w[t - 2], 19) ^ (w[t - 2] >> 10)
+            w[t] = (w[t - 16] + s0 + w[t - 7] + s1) & MASK
+
+
+@njit(cache=True, nogil=True)
+def _sha256_compress(state: np.ndarray, block: np.ndarray, w: np.ndarray) -> None:
+    """
+    Function to run the SHA-256 compression function over one 64-byte block
+
+    Parameters:
+    state (np.ndarray): The eight hash words, updated in place
+    block (np.ndarray): The 64 message bytes
+    w (np.ndarray): Scratch space for the 64-word message schedule
+    """
+    for t in range(16):
+        w[t] = (np.int64(block[4 * t]) << 24) | (np.int64(block[4 * t + 1]) << 16) | \
+               (np.int64(block[4 * t + 2]) << 8) | np.int64(block[4 * t + 3])
+    _expand_schedule(w, np.zeros(64, dtype=np.bool_))
+    working = (state[0], state[1], state[2], state[3], state[4], state[5], state[6], state[7])
+    _feed_forward(state, state, _sha256_rounds(working, w, 0, 64))
+
+
+@njit(cache=True, nogil=True)
+def _nonce_template(length: int, tail: np.ndarray, digit_count: int, base: np.ndarray, words: np.ndarray,
+                    fixed: np.ndarray) -> int:
+    """
+    Function to build the final message blocks shared by every nonce with the given number of decimal digits
+
+    The digits are left as zero bytes, and every schedule word that does not depend on them is expanded once here
+
+    Parameters:
+    length (int): The number of prefix bytes absorbed into the midstate
+    tail (np.ndarray): The remaining prefix bytes that every candidate nonce is appended to
+    digit_count (int): The number of decimal digits of the nonces
+    base (np.ndarray): The 32 message words of the final blocks, filled in
+    words (np.ndarray): The message schedule of each final block, filled in
+    fixed (np.ndarray): Flags of the schedule words of each final block that do not depend on the nonce, filled in
+
+    Returns:
+    int: The number of final blocks, 1 or 2
+    """
+    buffer = np.zeros(128, dtype=np.uint8)
+    buffer[:tail.size] = tail
+    end = tail.size + digit_count
+    buffer[end] = 0x80
+    blocks = 1 if end + 9 <= 64 else 2
+    bits = (length + end) * 8
+    for i in range(8):
+        buffer[blocks * 64 - 1 - i] = (bits >> (8 * i)) & 0xFF
+    for j in range(32):
+        base[j] = (np.int64(buffer[4 * j]) << 24) | (np.int64(buffer[4 * j + 1]) << 16) | \
+                  (np.int64(buffer[4 * j + 2]) << 8) | np.int64(buffer[4 * j + 3])
+
+    first_word = tail.size // 4
+    last_word = (end - 1) // 4
+    for b in range(blocks):
+        for t in range(16):
+            words[b, t] = base[16 * b + t]
+            fixed[b, t] = not first_word <= 16 * b + t <= last_word
+        # A schedule word is fixed when all four words it is computed from are fixed
+        for t in range(16, 64):
+            fixed[b, t] = fixed[b, t - 2] and fixed[b, t - 7] and fixed[b, t - 15] and fixed[b, t - 16]
+        fixed_words = fixed[b].copy()
+        fixed_words[16:] = False
+        _expand_schedule(words[b], fixed_words)
+    return blocks
+
+
+@njit(cache=True, nogil=True)
+def find_nonce(midstate: np.ndarray, length: int, tail: np.ndarray, start_nonce: int, count: int) -> int:
+    """
+    Function to search a range of nonce values for one whose hash starts with 16 zero bits
+
+    Parameters:
+    midstate (np.ndarray): The hash words after absorbing the complete blocks of the prefix
+    length (int): The number of prefix bytes absorbed into the midstate
+    tail (np.ndarray): The remaining prefix bytes that every candidate nonce is appended to
+    start_nonce (int): The first nonce value to try
+    count (int): The number of consecutive nonce values to try
+
+    Returns:
+    int: The first nonce value in the range that satisfies the condition, or -1 if there is none
+    """
+    base = np.empty(32, dtype=np.int64)
+    words = np.empty((2, 64), dtype=np.int64)
+    fixed = np.empty((2, 64), dtype=np.bool_)
+    state = np.empty(8, dtype=np.int64)
+    digits = np.empty(20, dtype=np.int64)
+    end_nonce = start_nonce + count
+
+    nonce = start_nonce
+    while nonce < end_nonce:
+        # ASCII digits of the nonce, most significant first
+        digit_count = len(str(nonce))
+        n = nonce
+        for i in range(digit_count - 1, -1, -1):
+            digits[i] = 48 + n % 10
+            n //= 10
+        # Specialize the final blocks for all nonces up to the next power of ten, which all have this many digits
+        blocks = _nonce_template(length, tail, digit_count, base, words, fixed)
+        regime_end = min(end_nonce, 10 ** digit_count) if digit_count < 19 else end_nonce
+        first_word = tail.size // 4
+        last_word = (tail.size + digit_count - 1) // 4
+
+        # Views of the schedule and flags of each final block, hoisted out of the nonce loop. The tail is shorter
+        # than a block, so the digits always start in the first one
+        w0 = words[0]
+        w1 = words[1]
+        f0 = fixed[0]
+        f1 = fixed[1]
+
+        # The rounds before the first digit word only see constant words, so run them once, together with the
+        # parts of the first varying round that do not depend on its message word
+        first_round = first_word
+        working = (midstate[0], midstate[1], midstate[2], midstate[3], midstate[4], midstate[5], midstate[6],
+                   midstate[7])
+        a, b, c, d, e, f, g, h = _sha256_rounds(working, w0, 0, first_round)
+        t1_base = (h + (_rotr(e, 6) ^ _rotr(e, 11) ^ _rotr(e, 25)) + ((e & f) ^ (~e & g)) + K[first_round]) & MASK
+        t2 = ((_rotr(a, 2) ^ _rotr(a, 13) ^ _rotr(a, 22)) + ((a & b) ^ (a & c) ^ (b & c))) & MASK
+
+        while nonce < regime_end:
+            # Only the words holding digits change between nonces
+            for j in range(first_word, last_word + 1):
+                words[j // 16, j % 16] = base[j]
+            for i in range(digit_count):
+                p = tail.size + i
+                words[p // 64, (p % 64) // 4] |= digits[i] << (24 - 8 * (p % 4))
+
+            _expand_schedule(w0, f0)
+            t1 = (t1_base + w0[first_round]) & MASK
+            working = ((t1 + t2) & MASK, a, b, c, (d + t1) & MASK, e, f, g)
+            if blocks == 1:
+                first_word_of_hash = _first_hash_word(working, w0, first_round + 1, midstate[0])
+            else:
+                _feed_forward(state, midstate, _sha256_rounds(working, w0, first_round + 1, 64))
+                _expand_schedule(w1, f1)
+                working = (state[0], state[1], state[2], state[3], state[4], state[5], state[6], state[7])
+                first_word_of_hash = _first_hash_word(working, w1, 0, state[0])
+            # The first 4 hex digits of the hash are 0 exactly when the top 16 bits of the first word are 0
+            if first_word_of_hash >> 16 == 0:
+                return nonce
+
+            # Increment the ASCII digits in place, the carry never leaves the digits before the next power of ten
+            i = digit_count - 1
+            while i >= 0 and digits[i] == 57:
+                digits[i] = 48
+                i -= 1
+            if i >= 0:
+                digits[i] += 1
+            nonce += 1
+    return -1
+
+
+def prefix_midstate(prefix: bytes) -> tuple:
+    """
+    Function to hash the complete 64-byte SHA-256 blocks of a prefix that is shared by every candidate nonce
+
+    Parameters:
+    prefix (bytes): The raw block hash that every candidate nonce is appended to
+
+    Returns:
+    tuple: The midstate with the number of bytes it absorbed, and the remaining bytes of the prefix
+    """
+    data = np.frombuffer(prefix, dtype=np.uint8)
+    split = len(data) - len(data) % 64
+    state = IV.copy()
+    w = np.empty(64, dtype=np.int64)
+    for offset in range(0, split, 64):
+        _sha256_compress(state, data[offset:offset + 64], w)
+    return (state, split), data[split:].copy()
+
+
+def search_nonce(midstate: tuple, tail: np.ndarray, start_nonce: int, count: int) -> int:
+    """
+    Function to search a range of nonce values with the compiled SHA-256 kernel
+
+    Parameters:
+    midstate (tuple): The midstate and absorbed length returned by prefix_midstate
+    tail (np.ndarray): The remaining prefix bytes returned by prefix_midstate
+    start_nonce (int): The first nonce value to try
+    count (int): The number of consecutive nonce values to try
+
+    Returns:
+    int: The first nonce value in the range that satisfies the condition, or -1 if there is none
+    """
+    state, length = midstate
+    return find_nonce(state, length, tail, start_nonce, count)
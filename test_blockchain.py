@@ -0,0 +1,99 @@
+import unittest
+from unittest import mock
+
+import main
+
+
+def scan_balance(blockchain: main.Blockchain, address: str) -> float:
+    """
+    Function to calculate the balance of an address by iterating through all transactions in the blockchain
+
+    Parameters:
+    blockchain (main.Blockchain): The blockchain to scan
+    address (str): The address to get the balance for
+
+    Returns:
+    float: The balance of the address
+    """
+    balance = 0
+    for block in blockchain.chain:
+        for transaction in block.transactions:
+            if transaction['sender'] == address:
+                balance -= transaction['amount']
+            elif transaction['recipient'] == address:
+                balance += transaction['amount']
+    return balance
+
+
+class BalanceLedgerTest(unittest.TestCase):
+    ADDRESSES = ["alice", "bob", "carol", "miner", "Blockchain", "nobody"]
+
+    def setUp(self) -> None:
+        self.blockchain = main.Blockchain(mining_threads=1)
+        self.blockchain.add_transaction("alice", "bob", 5.5)
+        self.blockchain.add_transaction("bob", "bob", 2.0)
+        self.blockchain.add_transaction("carol", "alice", 3)
+        self.blockchain.mine_block("miner")
+        self.blockchain.add_transaction("bob", "carol", 1.25)
+        self.blockchain.mine_block("miner")
+        # Pending transactions are not in a mined block yet and must not count
+        self.blockchain.add_transaction("alice", "carol", 100.0)
+
+    def assert_ledger_matches_scan(self) -> None:
+        for address in self.ADDRESSES:
+            with self.subTest(address=address):
+                expected = scan_balance(self.blockchain, address)
+                balance = self.blockchain.get_balance(address)
+                self.assertEqual(balance, expected)
+                self.assertIs(type(balance), type(expected))
+
+    def test_ledger_matches_chain_scan(self) -> None:
+        self.assert_ledger_matches_scan()
+
+    def test_self_transfer_only_counts_as_sent(self) -> None:
+        self.assertEqual(self.blockchain.get_balance("bob"), 5.5 - 2.0 - 1.25)
+
+    def test_reward_and_unknown_balances_are_ints(self) -> None:
+        self.assertEqual(self.blockchain.get_balance("nobody"), 0)
+        self.assertIs(type(self.blockchain.get_balance("nobody")), int)
+        self.assertIs(type(self.blockchain.get_balance("miner")), int)
+
+    def test_ledger_resyncs_after_validation_failure(self) -> None:
+        # Replace the last block behind the ledger's back, so the ledger still counts its transactions
+        self.blockchain.chain[-1] = main.Block(index=len(self.blockchain.chain) - 1, timestamp=0, transactions=[],
+                                               previous_hash="forged")
+        self.assertFalse(self.blockchain.is_chain_valid())
+        self.assert_ledger_matches_scan()
+
+
+class ChainValidationTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.blockchain = main.Blockchain(mining_threads=1)
+        for amount in range(3):
+            self.blockchain.add_transaction("alice", "bob", amount)
+            self.blockchain.mine_block("miner")
+
+    def test_mined_chain_is_valid(self) -> None:
+        self.assertTrue(self.blockchain.is_chain_valid())
+        self.assertEqual(self.blockchain._last_verified_index, len(self.blockchain.chain) - 1)
+
+    def test_verified_blocks_are_skipped(self) -> None:
+        self.assertTrue(self.blockchain.is_chain_valid())
+        with mock.patch.object(main.Block, 'calculate_hash', autospec=True,
+                               side_effect=main.Block.calculate_hash) as calculate_hash:
+            self.assertTrue(self.blockchain.is_chain_valid())
+            self.assertEqual(calculate_hash.call_count, 0)
+            self.blockchain.add_transaction("bob", "alice", 1)
+            self.blockchain.mine_block("miner")
+            calculate_hash.reset_mock()
+            self.assertTrue(self.blockchain.is_chain_valid())
+            self.assertEqual([call.args[0] for call in calculate_hash.call_args_list], [self.blockchain.chain[-1]])
+
+    def test_unverified_mismatch_is_detected(self) -> None:
+        self.blockchain.chain[-1].hash = "0" * 64
+        self.assertFalse(self.blockchain.is_chain_valid())
+        self.assertEqual(self.blockchain._last_verified_index, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+import hashlib
+import unittest
+
+import main
+
+try:
+    import pow_numba
+except ImportError:
+    pow_numba = None
+
+try:
+    import pow_cuda
+except ImportError:
+    pow_cuda = None
+
+# Optimized backends that can run here, each checked against the hashlib search of Blockchain
+BACKENDS = []
+if pow_numba is not None:
+    BACKENDS.append(pow_numba)
+if pow_cuda is not None and pow_cuda.is_available():
+    BACKENDS.append(pow_cuda)
+
+
+def all_nonces(backend, prefix: bytes, start_nonce: int, count: int) -> list:
+    """
+    Function to collect every valid nonce of a range by restarting the search after each hit
+
+    Parameters:
+    backend: The object or module providing prefix_midstate and search_nonce
+    prefix (bytes): The prefix that every candidate nonce is appended to
+    start_nonce (int): The first nonce value to try
+    count (int): The number of consecutive nonce values to try
+
+    Returns:
+    list: The valid nonce values of the range in ascending order
+    """
+    midstate, tail = backend.prefix_midstate(prefix)
+    end_nonce = start_nonce + count
+    nonces = []
+    while start_nonce < end_nonce:
+        nonce = backend.search_nonce(midstate, tail, start_nonce, end_nonce - start_nonce)
+        if nonce == -1:
+            break
+        nonces.append(nonce)
+        start_nonce = nonce + 1
+    return nonces
+
+
+@unittest.skipIf(not BACKENDS, "neither numba nor a usable CUDA device is available")
+class PowBackendTest(unittest.TestCase):
+    # Prefix lengths covering an empty tail, the raw block hash, tails that push the nonce into a second block
+    # and prefixes with complete blocks absorbed into the midstate
+    PREFIX_LENGTHS = [0, 1, 32, 50, 54, 55, 60, 63, 64, 65, 100, 128, 130]
+    # Nonce ranges crossing the 1 to 2, 5 to 6, 6 to 7 and 10 to 11 digit boundaries
+    RANGES = [(0, 150000), (99000, 150000), (999000, 150000), (2 ** 32 - 75000, 150000)]
+
+    def setUp(self) -> None:
+        self.blockchain = main.Blockchain(mining_threads=1)
+
+    def test_search_nonce_matches_hashlib(self) -> None:
+        for length in self.PREFIX_LENGTHS:
+            prefix = (hashlib.sha256(str(length).encode()).digest() * 5)[:length]
+            for start_nonce, count in self.RANGES:
+                expected = all_nonces(self.blockchain, prefix, start_nonce, count)
+                for backend in BACKENDS:
+                    with self.subTest(backend=backend.__name__, length=length, start_nonce=start_nonce):
+                        self.assertEqual(all_nonces(backend, prefix, start_nonce, count), expected)
+
+    def test_nonces_are_valid_proofs(self) -> None:
+        block_hash_raw = hashlib.sha256(b'block').digest()
+        for backend in BACKENDS:
+            with self.subTest(backend=backend.__name__):
+                for nonce in all_nonces(backend, block_hash_raw, 0, 150000):
+                    self.assertTrue(self.blockchain.valid_proof(block_hash_raw, nonce))
+
+
+if __name__ == '__main__':
+    unittest.main()